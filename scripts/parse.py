@@ -9,6 +9,7 @@ import json
 import os
 import re
 import sys
+from collections import defaultdict
 from pathlib import Path
 
 import anthropic
@@ -20,6 +21,48 @@ load_dotenv(Path(__file__).parent.parent / '.env')
 
 DATA_DIR = Path(__file__).parent.parent / 'data'
 
+# Model cascade: try the fast tier first, escalate to the full tier on validation failure
+MODEL_TIERS = {
+    'fast': {'model': 'claude-haiku-4-5-20251001', 'max_tokens': 16000},
+    'full': {'model': 'claude-sonnet-4-20250514', 'max_tokens': 16000},
+}
+
+# Allowed categories and normalized keys (must match EXTRACTION_PROMPT)
+CATEGORY_KEYS = {
+    'hospitalization': {'hospital_stay', 'daily_hospital_fee', 'private_room', 'surgical_fees'},
+    'general_care': {'general_practitioner', 'specialist', 'lab_tests', 'medication'},
+    'optical': {'simple_lenses', 'complex_lenses', 'contact_lenses'},
+    'dental': {'dental_care', 'dental_prosthetics', 'orthodontics', 'implants'},
+    'hearing_aids': {'hearing_aids'},
+}
+
+FIXED_UNITS = {'EUR', 'EUR/day', 'EUR/year'}
+
+# Document labels hinting that a normalized key should appear in the output
+KEY_PATTERNS = {
+    'hospital_stay': r"frais de s[ée]jour",
+    'daily_hospital_fee': r"forfait journalier",
+    'private_room': r"chambre particuli[èe]re",
+    'surgical_fees': r"chirurgica",
+    'general_practitioner': r"g[ée]n[ée]raliste|\b[od]ptam\b",
+    'lab_tests': r"analyses|biologie",
+    'medication': r"pharmacie|m[ée]dicaments",
+    'simple_lenses': r"verres?\s+(?:simples?|unifocaux|[àa] simple foyer)",
+    'complex_lenses': r"verres?\s+(?:complexes?|progressifs?)",
+    'contact_lenses': r"lentilles",
+    'dental_care': r"soins dentaires|soins des paniers",
+    'dental_prosthetics': r"proth[èe]ses\s+(?:dentaires|fixes|\"offre)|couronnes?",
+    'orthodontics': r"orthodontie",
+    'implants': r"implant",
+    'hearing_aids': r"appareils? auditifs?|aides? auditives?|audioproth[ée]s",
+}
+
+# Minimum share of keys detected in the text that the output must cover
+MIN_KEY_COVERAGE = 0.85
+# Minimum share of the best-covered plan's keys each plan must have (catches truncated plans;
+# entry-level plans legitimately skip several guarantees, so completeness is checked per document)
+MIN_PLAN_COVERAGE = 0.5
+
 EXTRACTION_PROMPT = """You are a French health insurance (mutuelle) expert. Extract guarantee data from this document into structured JSON.
 
 ## CATEGORIES
@@ -141,35 +184,104 @@ def extract_text(insurer: str) -> str:
     return full_text
 
 
-def parse_with_claude(insurer: str, text: str) -> dict:
-    """Send text to Claude for structured extraction."""
-    api_key = os.getenv('ANTHROPIC_API_KEY')
-    if not api_key:
-        raise ValueError("ANTHROPIC_API_KEY not set in environment")
-
-    client = anthropic.Anthropic(api_key=api_key)
-
-    print("Sending to Claude for parsing...")
-
-    message = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=16000,
-        messages=[
-            {
-                "role": "user",
-                "content": f"{EXTRACTION_PROMPT}\n\n--- DOCUMENT CONTENT ---\n\n{text}"
-            }
-        ]
-    )
-
-    response_text = message.content[0].text
-
-    # Save raw Claude response
-    raw_path = DATA_DIR / insurer / 'claude-response.txt'
-    raw_path.write_text(response_text, encoding='utf-8')
-    print(f"✓ Raw response saved to {raw_path}")
-
-    # Extract JSON from response
+def detect_keys(text: str) -> set[str]:
+    """Detect normalized keys whose labels appear in the extracted text."""
+    lowered = text.lower()
+    return {key for key, pattern in KEY_PATTERNS.items() if re.search(pattern, lowered)}
+
+
+def detect_plan_count(text: str) -> int:
+    """Detect the number of plan columns from headers like "Niveau 1 Niveau 2 ... Niveau 6"."""
+    count = 0
+    for line in text.splitlines():
+        numbers = defaultdict(set)
+        for word, n in re.findall(r"\b([^\W\d_]+) (\d{1,2})\b", line):
+            numbers[word.lower()].add(int(n))
+        for found in numbers.values():
+            # Only consecutive columns starting at 1 count as plan headers
+            if len(found) >= 2 and found == set(range(1, len(found) + 1)):
+                count = max(count, len(found))
+    return count
+
+
+def validate_parsed(data: dict, text: str) -> list[str]:
+    """Check parsed data against the allowed schema. Returns a list of issues (empty if valid)."""
+    if not isinstance(data, dict):
+        return ["response is not a JSON object"]
+
+    issues = []
+    for field in ('name', 'brand'):
+        if not isinstance(data.get(field), str) or not data[field].strip():
+            issues.append(f"missing '{field}'")
+
+    plans = data.get('plans')
+    if not isinstance(plans, list) or not plans:
+        return issues + ["no plans extracted"]
+
+    expected = detect_keys(text)
+    expected_plans = detect_plan_count(text)
+    if len(plans) < expected_plans:
+        issues.append(f"missing plans: {len(plans)} extracted, {expected_plans} detected in text")
+
+    plan_keys = {}
+    for i, plan in enumerate(plans, 1):
+        if not isinstance(plan, dict):
+            issues.append(f"plan {i}: not an object")
+            continue
+        if not isinstance(plan.get('level'), int):
+            issues.append(f"plan {i}: invalid level")
+        guarantees = plan.get('guarantees')
+        if not isinstance(guarantees, list) or not guarantees:
+            issues.append(f"plan {i}: no guarantees")
+            continue
+
+        found_keys = set()
+        for g in guarantees:
+            if not isinstance(g, dict):
+                issues.append(f"plan {i}: guarantee is not an object")
+                continue
+            category, key = g.get('category'), g.get('key')
+            if category not in CATEGORY_KEYS:
+                issues.append(f"plan {i}: unknown category '{category}'")
+            elif key not in CATEGORY_KEYS[category]:
+                issues.append(f"plan {i}: key '{key}' not allowed in '{category}'")
+            else:
+                found_keys.add(key)
+            if not isinstance(g.get('label'), str) or not g['label'].strip():
+                issues.append(f"plan {i}: '{key}' has no label")
+
+            r = g.get('reimbursement')
+            r_type = r.get('type') if isinstance(r, dict) else None
+            if r_type == 'percentage':
+                valid = isinstance(r.get('value'), (int, float))
+            elif r_type == 'fixed':
+                valid = isinstance(r.get('value'), (int, float)) and r.get('unit') in FIXED_UNITS
+            else:
+                valid = r_type == 'real_costs'
+            if not valid:
+                issues.append(f"plan {i}: '{key}' has invalid reimbursement {r}")
+
+        plan_keys[i] = found_keys
+
+    # Coverage: no plan should have far fewer keys than the best-covered one
+    best = max((len(keys) for keys in plan_keys.values()), default=0)
+    for i, keys in plan_keys.items():
+        if best and len(keys) / best < MIN_PLAN_COVERAGE:
+            issues.append(f"plan {i}: only {len(keys)} keys, best plan has {best}")
+
+    # Coverage: keys hinted in the document should show up in at least one plan
+    if expected:
+        all_keys = set().union(*plan_keys.values())
+        missing = expected - all_keys
+        coverage = 1 - len(missing) / len(expected)
+        if coverage < MIN_KEY_COVERAGE:
+            issues.append(f"incomplete coverage ({coverage:.0%}), missing: {', '.join(sorted(missing))}")
+
+    return issues
+
+
+def extract_json(response_text: str) -> dict:
+    """Extract the JSON object from a Claude response."""
     json_str = response_text
 
     # Try markdown code block first
@@ -182,12 +294,98 @@ def parse_with_claude(insurer: str, text: str) -> dict:
         if raw_match:
             json_str = raw_match.group(0)
 
-    try:
-        return json.loads(json_str)
-    except json.JSONDecodeError as e:
-        print(f"✗ Failed to parse JSON: {e}")
-        print(f"Raw response preview: {response_text[:500]}")
-        raise
+    return json.loads(json_str)
+
+
+def parse_with_claude(insurer: str, text: str, cascade: bool = True) -> tuple[dict, dict]:
+    """Send text to Claude for structured extraction.
+
+    With cascade enabled, the fast model is tried first and the full model is only
+    used when its output fails validation. Returns the parsed data and its metadata
+    (tier, model, validation issues).
+    """
+    api_key = os.getenv('ANTHROPIC_API_KEY')
+    if not api_key:
+        raise ValueError("ANTHROPIC_API_KEY not set in environment")
+
+    client = anthropic.Anthropic(api_key=api_key)
+    tiers = ['fast', 'full'] if cascade else ['full']
+
+    # Drop raw responses from previous runs so each file matches this run's tiers
+    for tier in MODEL_TIERS:
+        (DATA_DIR / insurer / f'claude-response.{tier}.txt').unlink(missing_ok=True)
+
+    for tier in tiers:
+        config = MODEL_TIERS[tier]
+        print(f"Sending to Claude for parsing ({tier}: {config['model']})...")
+        is_last = tier == tiers[-1]
+
+        try:
+            message = client.messages.create(
+                model=config['model'],
+                max_tokens=config['max_tokens'],
+                messages=[
+                    {
+                        "role": "user",
+                        "content": f"{EXTRACTION_PROMPT}\n\n--- DOCUMENT CONTENT ---\n\n{text}"
+                    }
+                ]
+            )
+        except anthropic.APIError as e:
+            # Rate limits, overload or an unavailable model must not block the full tier
+            print(f"✗ API error: {e}")
+            if is_last:
+                raise
+            print("↑ Escalating to full model")
+            continue
+
+        response_text = message.content[0].text
+
+        # Save raw Claude response per tier (kept when escalating)
+        raw_path = DATA_DIR / insurer / f'claude-response.{tier}.txt'
+        raw_path.write_text(response_text, encoding='utf-8')
+        print(f"✓ Raw response saved to {raw_path}")
+
+        try:
+            data = extract_json(response_text)
+        except json.JSONDecodeError as e:
+            print(f"✗ Failed to parse JSON: {e}")
+            if is_last:
+                print(f"Raw response preview: {response_text[:500]}")
+                raise
+            print("↑ Escalating to full model")
+            continue
+
+        issues = validate_parsed(data, text)
+        if message.stop_reason == 'max_tokens':
+            issues.insert(0, "response truncated (max_tokens reached)")
+
+        if not issues:
+            print(f"✓ Validated ({tier} tier)")
+            return data, {'tier': tier, 'model': config['model'], 'issues': issues}
+
+        print(f"✗ Validation failed ({len(issues)} issues):")
+        for issue in issues[:10]:
+            print(f"  - {issue}")
+        if is_last:
+            # No higher tier left: keep the result but record the issues
+            return data, {'tier': tier, 'model': config['model'], 'issues': issues}
+        print("↑ Escalating to full model")
+
+    raise RuntimeError("No model tier configured")
+
+
+def save_parse_meta(insurer: str, meta: dict) -> None:
+    """Record which model tier produced parsed.json."""
+    output_path = DATA_DIR / insurer / 'parse-meta.json'
+    output_path.write_text(json.dumps(meta, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+def format_result(insurer: str, data: dict, meta: dict) -> str:
+    """One-line parse result, flagged when the served output failed validation."""
+    issues = len(meta['issues'])
+    marker = f"⚠ Done with {issues} issues" if issues else "✓ Done"
+    return f"{marker}: {data.get('name', insurer)} with {len(data.get('plans', []))} plans ({meta['tier']} tier)"
 
 
 def save_json(insurer: str, data: dict) -> None:
@@ -210,7 +408,12 @@ def cmd_list(_args: argparse.Namespace) -> None:
         if (DATA_DIR / name / 'extracted-text.txt').exists():
             status.append("text")
         if (DATA_DIR / name / 'parsed.json').exists():
-            status.append("json")
+            meta_path = DATA_DIR / name / 'parse-meta.json'
+            try:
+                tier = json.loads(meta_path.read_text(encoding='utf-8')).get('tier')
+            except (OSError, json.JSONDecodeError, AttributeError):
+                tier = None
+            status.append(f"json ({tier})" if tier else "json")
         status_str = f" [{', '.join(status)}]" if status else ""
         print(f"  - {name}{status_str}")
 
@@ -259,12 +462,13 @@ def cmd_parse(args: argparse.Namespace) -> None:
         sys.exit(1)
 
     text = extract_text(insurer)
-    data = parse_with_claude(insurer, text)
+    data, meta = parse_with_claude(insurer, text, cascade=not args.no_cascade)
     save_json(insurer, data)
-    print(f"✓ Done: {data.get('name', insurer)} with {len(data.get('plans', []))} plans")
+    save_parse_meta(insurer, meta)
+    print(format_result(insurer, data, meta))
 
 
-def cmd_parse_all(_args: argparse.Namespace) -> None:
+def cmd_parse_all(args: argparse.Namespace) -> None:
     """Parse all insurers with Claude API."""
     insurers = get_insurers()
     if not insurers:
@@ -273,6 +477,7 @@ def cmd_parse_all(_args: argparse.Namespace) -> None:
 
     parsed = 0
     errors = 0
+    results = {}
 
     for insurer in insurers:
         try:
@@ -280,16 +485,24 @@ def cmd_parse_all(_args: argparse.Namespace) -> None:
             print(f"Processing: {insurer}")
             print('='*50)
             text = extract_text(insurer)
-            data = parse_with_claude(insurer, text)
+            data, meta = parse_with_claude(insurer, text, cascade=not args.no_cascade)
             save_json(insurer, data)
-            print(f"✓ Done: {data.get('name', insurer)} with {len(data.get('plans', []))} plans")
+            save_parse_meta(insurer, meta)
+            print(format_result(insurer, data, meta))
+            results[insurer] = meta
             parsed += 1
         except Exception as e:
             print(f"✗ Error parsing {insurer}: {e}")
             errors += 1
 
     print(f"\n{'='*50}")
-    print(f"Summary: {parsed} parsed, {errors} errors")
+    with_issues = sum(1 for meta in results.values() if meta['issues'])
+    print(f"Summary: {parsed} parsed ({with_issues} with issues), {errors} errors")
+    for insurer, meta in results.items():
+        issues = len(meta['issues'])
+        suffix = f" ({issues} issues)" if issues else ""
+        marker = "⚠" if issues else "✓"
+        print(f"  {marker} {insurer}: {meta['tier']}{suffix}")
 
 
 def main() -> None:
@@ -315,10 +528,12 @@ def main() -> None:
     # parse <insurer>
     parse_parser = subparsers.add_parser('parse', help='Full parsing with Claude API')
     parse_parser.add_argument('insurer', help='Insurer name (folder in data/)')
+    parse_parser.add_argument('--no-cascade', action='store_true', help='Skip the fast model and use the full model directly')
     parse_parser.set_defaults(func=cmd_parse)
 
     # parse-all
     parse_all_parser = subparsers.add_parser('parse-all', help='Parse all insurers with Claude API')
+    parse_all_parser.add_argument('--no-cascade', action='store_true', help='Skip the fast model and use the full model directly')
     parse_all_parser.set_defaults(func=cmd_parse_all)
 
     args = parser.parse_args()